@@ -5,9 +5,12 @@ an argument parser.
 
 import typing
 import sys
+import bisect
+import weakref
 import argparse
 from argparseware import ArgumentParser
 from argparseware import IMiddleware
+from argparseware.utils import MISSING
 
 
 class Argument():
@@ -30,6 +33,118 @@ class Argument():
         parser.add_argument(*self.args, **self.kwargs)
 
 
+class _PendingParser():
+    """
+    This class holds the deferred construction of a subparser.
+    """
+
+    def __init__(self, kwargs: dict) -> None:
+        """
+        The *kwargs* argument is the arguments to pass to `add_parser()` once the
+        parser is materialized.
+        """
+        self.kwargs = kwargs
+        self.callbacks = []
+
+
+class _LazyParserMap(dict):
+    """
+    This class is the parser map of a `LazySubParsersAction`, materializing pending
+    parsers when they are looked up, or all of them when its values or items are
+    listed.
+    """
+
+    def __init__(self, action: 'LazySubParsersAction') -> None:
+        """
+        The *action* argument is the subparsers action that owns this map.
+        """
+        super().__init__()
+        self.action = action
+
+    def __getitem__(self, key: str) -> argparse.ArgumentParser:
+        value = super().__getitem__(key)
+        if isinstance(value, _PendingParser):
+            value = self.action.materialize(key)
+        return value
+
+    def get(self, key: str, default: typing.Any = None) -> typing.Any:
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def values(self) -> typing.ValuesView[argparse.ArgumentParser]:
+        self.materialize_all()
+        return super().values()
+
+    def items(self) -> typing.ItemsView[str, argparse.ArgumentParser]:
+        self.materialize_all()
+        return super().items()
+
+    def materialize_all(self) -> None:
+        """
+        Materialize every pending parser, for code that walks the whole parser tree.
+        """
+        for name in [x for x, value in dict.items(self) if isinstance(value, _PendingParser)]:
+            self.action.materialize(name)
+
+
+class LazySubParsersAction(argparse._SubParsersAction):  # pylint:disable=protected-access
+    """
+    This class extends the subparsers action to defer the construction of subparsers
+    until they are actually needed.
+    """
+
+    def __init__(self, *args, **kwargs) -> None:
+        """
+        Accepts the same arguments as the parent `_SubParsersAction`.
+        """
+        super().__init__(*args, **kwargs)
+        self._name_parser_map = self.choices = _LazyParserMap(self)
+
+    def add_lazy_parser(self, name: str, callback: typing.Callable, **kwargs) -> None:
+        """
+        Register a subparser without constructing it. The *callback* argument is a
+        callable that is passed the subparser once it is materialized, which happens
+        when it is looked up, typically when the command is selected on the command
+        line. The *kwargs* arguments are passed to `add_parser()`.
+
+        If the subparser already exists, only the *callback* is registered and its
+        original arguments are kept.
+        """
+        value = dict.get(self._name_parser_map, name)
+        if value is None:
+            if 'help' in kwargs:
+                choice_action = self._ChoicesPseudoAction(name, (), kwargs.pop('help'))
+                self._choices_actions.append(choice_action)
+            value = self._name_parser_map[name] = _PendingParser(kwargs)
+
+        if isinstance(value, _PendingParser):
+            value.callbacks.append(callback)
+        else:
+            callback(value)
+
+    def materialize(self, name: str) -> argparse.ArgumentParser:
+        """
+        Construct a pending subparser and run its registered callbacks. The parser
+        keeps its position in the map.
+        """
+        parser_map = self._name_parser_map
+        order = list(parser_map)
+        pending = dict.pop(parser_map, name)
+        parser = self.add_parser(name, **pending.kwargs)
+
+        # the parser is added back at the end of the map, so restore the original order
+        if order[-1] != name:
+            items = [(x, dict.__getitem__(parser_map, x)) for x in order]
+            dict.clear(parser_map)
+            dict.update(parser_map, items)
+
+        for callback in pending.callbacks:
+            callback(parser)
+        return parser
+
+
 class Command():
     """
     This class is used to define commands for parsers.
@@ -46,12 +161,17 @@ class Command():
         argument is the list of `Argument` objects to add to the command. The *kwargs*
         arguments are passed to `add_parser()` and mostly mirrors `add_argument()`.
         """
-        self.command = command
+        self.command = sys.intern(command)
         self.handler = handler
         self.args = list(args)
         self.kwargs = kwargs
         self.kwargs['help'] = self.kwargs.get('help', '')
 
+        self.parts = tuple(command.split(' '))
+        self._depth = len(self.parts) - 1
+        self._dests = tuple('{}{}'.format(self.TEMP_PREFIX, '_'.join(self.parts[:index]))
+                            for index in range(len(self.parts)))
+
     def add_argument(self, *args, **kwargs) -> Argument:
         """
         Add an argument to the parser. The *args* and *kwargs* arguments are the same
@@ -67,14 +187,22 @@ class Command():
         """
         Get the subparser action from an argument parser. If *add* is specified and the
         subparser does not exist, one is created and returned.
+
+        Since a parser can only have a single subparser action, it is cached on the
+        parser once found.
         """
         # pylint:disable=protected-access
 
-        action = next(iter([x for x in parser._actions
-                            if isinstance(x, argparse._SubParsersAction)]), None)
+        action = getattr(parser, '_argparseware_subaction', None)
+        if action is None:
+            action = next((x for x in parser._actions
+                           if isinstance(x, argparse._SubParsersAction)), None)
+
+            if not action and add:
+                action = parser.add_subparsers(metavar='command', action=LazySubParsersAction)
 
-        if not action and add:
-            action = parser.add_subparsers(metavar='command')
+            if action:
+                parser._argparseware_subaction = action
 
         action.dest = dest
         return action
@@ -83,38 +211,77 @@ class Command():
         """
         Apply the command to a parser.
         """
-        action = self.get_subparser_action(parser, self.TEMP_PREFIX, add=True)
+        action = self.get_subparser_action(parser, self._dests[0], add=True)
 
-        parts = self.command.split(' ')
-        for index, command in enumerate(parts):
+        for index, command in enumerate(self.parts):
             try:
                 subparser = action.choices[command]
             except KeyError:
-                kwargs = {'help': ''} if index < self.command.count(' ') else self.kwargs
+                kwargs = {'help': ''} if index < self._depth else self.kwargs
                 subparser = action.add_parser(command, **kwargs)
 
-            if index < self.command.count(' '):
-                dest = '{}{}'.format(self.TEMP_PREFIX, '_'.join(parts[:index + 1]))
-                action = self.get_subparser_action(subparser, dest, add=True)
+            if index < self._depth:
+                action = self.get_subparser_action(subparser, self._dests[index + 1], add=True)
 
         for arg in self.args:
             arg.apply(subparser)
 
         return subparser
 
+    def apply_lazy(self, parser: argparse.ArgumentParser, index: int = 0) -> None:
+        """
+        Apply the command to a parser, deferring the construction of the subparsers
+        until the command is selected. The *index* argument is the depth of the
+        command part to apply to the parser.
+        """
+        action = self.get_subparser_action(parser, self._dests[index], add=True)
+        kwargs = {'help': ''} if index < self._depth else dict(self.kwargs)
+
+        def callback(subparser):
+            """ Populate the subparser once it is materialized. """
+            if index < self._depth:
+                self.apply_lazy(subparser, index + 1)
+            else:
+                for arg in self.args:
+                    arg.apply(subparser)
+
+        if isinstance(action, LazySubParsersAction) and 'aliases' not in kwargs:
+            action.add_lazy_parser(self.parts[index], callback, **kwargs)
+            return
+
+        try:
+            subparser = action.choices[self.parts[index]]
+        except KeyError:
+            subparser = action.add_parser(self.parts[index], **kwargs)
+        callback(subparser)
+
 
 class CommandsMiddleware(IMiddleware):
     """
     This middleware is used to simply add commands and subcommands to an argument parser.
     """
 
-    def __init__(self, *args: typing.List[Command], dest: str = 'command') -> None:
+    def __init__(self, *args: typing.List[Command], dest: str = 'command',
+                 fast: bool = False) -> None:
         """
         The *args* argument is a list of `Command` objects to add.
+
+        The commands are kept sorted by name as they are added.
+
+        If *fast* is enabled, a command without arguments that is the only thing specified
+        on the command line can be dispatched with `dispatch_fast()` before the arguments
+        are parsed, then the process exits. This skips argument parsing entirely, along
+        with any other middleware. `CommandsArgumentParser` does this automatically when
+        parsing `sys.argv`.
         """
-        self.commands = list(args)
+        self.commands = sorted(args, key=lambda x: x.command)
+        self._names = [x.command for x in self.commands]
         self.dest = dest
+        self.fast = fast
         self.argparser = None
+        self._by_name = None
+        self._version = 0
+        self._applied_to = weakref.WeakKeyDictionary()
 
     def add_command(self, *args, **kwargs) -> Command:
         """
@@ -122,45 +289,84 @@ class CommandsMiddleware(IMiddleware):
         the resulting object is returned.
         """
         cmd = Command(*args, **kwargs)
-        self.commands.append(cmd)
+        index = bisect.bisect_right(self._names, cmd.command)
+        self._names.insert(index, cmd.command)
+        self.commands.insert(index, cmd)
+        self._version += 1
+        if self._by_name is not None:
+            self._by_name.setdefault(cmd.command, cmd)
         return cmd
 
+    def dispatch_fast(self, argv: typing.List[str]) -> None:
+        """
+        Run the handler of the command named by *argv* and exit, if *fast* is enabled
+        and that command takes no arguments. Otherwise, this does nothing.
+        """
+        if not self.fast:
+            return
+
+        argv = tuple(argv)
+        index = bisect.bisect_left(self._names, ' '.join(argv))
+        if index == len(self._names):
+            return
+
+        command = self.commands[index]
+        if command.parts == argv and command.handler and not command.args:
+            args = argparse.Namespace()
+            if self.dest:
+                setattr(args, self.dest, command.command)
+            command.handler(args)
+            sys.exit(0)
+
     def configure(self, parser: argparse.ArgumentParser) -> argparse.ArgumentParser:
         """
         Configure the middleware.
+
+        Configuring the same parser again only applies the commands that were added
+        since, and does nothing if there are none.
         """
-        if self.argparser is parser:
+        version, applied = self._applied_to.get(parser, (None, set()))
+        if version == self._version:
             return parser
 
         self.argparser = parser
-        for command in sorted(self.commands, key=lambda x: x.command):
-            command.apply(parser)
 
+        self._by_name = {}
+        for command in self.commands:
+            self._by_name.setdefault(command.command, command)
+
+        for command in self.commands:
+            if command not in applied:
+                command.apply_lazy(parser)
+                applied.add(command)
+
+        self._applied_to[parser] = (self._version, applied)
         return parser
 
     def run(self, args: argparse.Namespace) -> None:
         """
         Run the middleware.
         """
+        data = args.__dict__
         parts = []
+        key, sep = Command.TEMP_PREFIX, ''
         while True:
-            try:
-                key = '{}{}'.format(Command.TEMP_PREFIX, '_'.join(parts))
-                value = getattr(args, key)
-                delattr(args, key)
-                if value is None:
-                    break
-                parts.append(value)
-            except AttributeError:
+            value = data.pop(key, MISSING)
+            if value is MISSING or value is None:
                 break
+            parts.append(value)
+            key, sep = key + sep + value, '_'
 
-        name = ' '.join(parts)
+        name = sys.intern(' '.join(parts))
         if self.dest:
             setattr(args, self.dest, name)
 
-        for command in self.commands:
-            if command.command != name:
-                continue
+        if self._by_name is not None:
+            command = self._by_name.get(name)
+        else:
+            command = next((x for x in self.commands if x.command == name), None)
+
+        if command:
             if command.handler:
                 command.handler(args)
             return None
@@ -175,14 +381,28 @@ class CommandsArgumentParser(ArgumentParser):
     This class extends the default parser class and provides an `add_command()` method.
     """
 
-    def __init__(self, *args, **kwargs):
+    def __init__(self, *args, fast: bool = False, **kwargs):
         """
-        Accepts the same arguments as a regular `ArgumentParser`.
+        Accepts the same arguments as a regular `ArgumentParser`. The *fast* argument
+        is passed to the `CommandsMiddleware`.
         """
         super().__init__(*args, **kwargs)
-        self.commands = CommandsMiddleware()
+        self.commands = CommandsMiddleware(fast=fast)
         self.add_middleware(self.commands)
 
+    def parse_args(self, args: typing.List[str] = None,  # pylint: disable=arguments-differ
+                   namespace: argparse.Namespace = None) -> argparse.Namespace:
+        """
+        Override the parent method to dispatch commands through the fast path of the
+        commands middleware when parsing `sys.argv`.
+        """
+        if args is None:
+            for item in self.middlewares:
+                if isinstance(item, CommandsMiddleware):
+                    item.dispatch_fast(sys.argv[1:])
+
+        return super().parse_args(args, namespace)
+
     def add_command(self, *args, **kwargs) -> Command:
         """
         Mirrors the functionality of `Command.add_command()` on the current parser.
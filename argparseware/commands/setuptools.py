@@ -4,12 +4,25 @@ This module provides integration with setuptools.
 
 import os
 import io
-import re
 import sys
+import json
 import argparse
-import pkg_resources
+import importlib.util
+import typing
 
-from .commands import CommandsMiddleware
+from . import CommandsMiddleware
+from ..utils import get_distribution
+from ..utils import USAGE_RE
+from ..utils import WS_RE
+
+
+def _parse_entrypoint(entrypoint: 'EntryPoint') -> typing.Tuple[str, typing.List[str]]:
+    """
+    Get the module name and the attribute path an entry point refers to.
+    """
+    module, _, attrs = entrypoint.value.partition(':')
+    attrs = attrs.partition('[')[0].strip()
+    return (module.strip(), attrs.split('.') if attrs else [])
 
 
 class ConsoleScriptsMiddleware(CommandsMiddleware):
@@ -18,25 +31,121 @@ class ConsoleScriptsMiddleware(CommandsMiddleware):
     them available through a "global" parent script.
     """
 
-    def __init__(self, pkg_name: str, *, separator: str = '-', prefix: str = None) -> None:
+    def __init__(self, pkg_name: str, *, cache: bool = True, separator: str = '-',
+                 prefix: str = None) -> None:
         """
         The *pkg_name* argument is the name of the package to scan for entry points.
         The *separator* argument defines what separator to use when parsing script names,
         so that in `foo-bar`, `bar` becomes a possible command of `foo`.
 
+        The *cache* argument defines whether or not to cache the descriptions of the
+        commands on disk for faster subsequent executions.
+
         The *prefix* argument defines the prefix to ignore when parsing commands and defaults
         to the package name, with dot separators replaced by the *separator*.
         """
         super().__init__()
         self.pkg_name = pkg_name
+        self.cache = cache
         self.separator = separator
         self.prefix = prefix or pkg_name.replace('.', separator)
+        self._registered = False
+
+    @property
+    def cache_file(self) -> str:
+        """
+        Get the cache filename.
+        """
+        if not self.cache:
+            return None
+
+        path = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+        return os.path.join(path, 'argparseware', 'descs.json')
 
     @classmethod
-    def get_command_desc(cls, entrypoint: pkg_resources.EntryPoint) -> str:
+    def get_cache_key(cls, entrypoint: 'EntryPoint', dist: 'Distribution') -> str:
         """
-        Get a command description by running it and parsing the output.
+        Get the key under which the description of an entry point of the *dist*
+        distribution is cached.
+        """
+        return '|'.join([
+            dist.metadata['Name'],
+            dist.version,
+            entrypoint.name,
+            entrypoint.value,
+        ])
+
+    def load_cache(self) -> dict:
+        """
+        Load the cached command descriptions.
+        """
+        if not self.cache_file:
+            return {}
+
+        try:
+            with open(self.cache_file, 'r') as fpp:
+                return json.load(fpp)
+        except Exception:
+            return {}
+
+    def save_cache(self, data: dict) -> None:
+        """
+        Save the command descriptions to the cache.
+        """
+        if not self.cache_file:
+            return
+
+        try:
+            os.makedirs(os.path.dirname(self.cache_file), exist_ok=True)
+            filename = '{}.{}.tmp'.format(self.cache_file, os.getpid())
+            with open(filename, 'w') as fpp:
+                json.dump(data, fpp, separators=(',', ':'))
+            os.replace(filename, self.cache_file)
+        except Exception:
+            pass
+
+    @classmethod
+    def get_source_desc(cls, entrypoint: 'EntryPoint') -> str:
         """
+        Get a command description from the docstring of its entry point without importing
+        it. The module docstring is only used when the entry point is the module itself.
+        The first paragraph of the docstring is used.
+        """
+        import ast  # pylint: disable=import-outside-toplevel
+
+        module_name, attrs = _parse_entrypoint(entrypoint)
+
+        try:
+            spec = importlib.util.find_spec(module_name)
+            with open(spec.origin, 'rb') as fpp:
+                tree = ast.parse(fpp.read())
+        except Exception:
+            return None
+
+        node = tree
+        for attr in attrs:
+            node = next((x for x in getattr(node, 'body', [])
+                         if isinstance(x, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef))
+                         and x.name == attr), None)
+            if node is None:
+                return None
+
+        doc = ast.get_docstring(node)
+        if doc:
+            return WS_RE.sub(' ', doc.strip().split('\n\n')[0].replace('\n', ' '))
+
+        return None
+
+    @classmethod
+    def get_command_desc(cls, entrypoint: 'EntryPoint') -> str:
+        """
+        Get a command description from its source or, failing that, by running it and
+        parsing the output.
+        """
+        desc = cls.get_source_desc(entrypoint)
+        if desc:
+            return desc
+
         with open(os.devnull, 'a') as devnull:
             stdout, stderr, stdin, argv = sys.stdout, sys.stderr, sys.stdin, sys.argv
             sys.stdout = io.StringIO()
@@ -53,10 +162,9 @@ class ConsoleScriptsMiddleware(CommandsMiddleware):
             sys.stdout, sys.stderr, sys.stdin, sys.argv  = stdout, stderr, stdin, argv
 
             output = output.getvalue()
-            matches = re.match(r'^usage: .*\n\n([^\n]*)\n\n.*', output,
-                               flags=re.MULTILINE | re.DOTALL)
+            matches = USAGE_RE.match(output)
             if matches:
-                desc = re.sub(' +', ' ', matches.groups()[0].replace('\n', ' '))
+                desc = WS_RE.sub(' ', matches.groups()[0].replace('\n', ' '))
                 return desc
 
         return None
@@ -64,8 +172,18 @@ class ConsoleScriptsMiddleware(CommandsMiddleware):
     def configure(self, parser: argparse.ArgumentParser) -> argparse.ArgumentParser:
         """
         Configure the parser.
+
+        The console scripts are only registered as commands the first time.
         """
-        iter_items = pkg_resources.get_entry_map(self.pkg_name)['console_scripts']
+        if self._registered:
+            return super().configure(parser)
+        self._registered = True
+
+        dist = get_distribution(self.pkg_name)
+        prefix = '{}{}'.format(self.prefix, self.separator)
+        prefix_len = len(prefix)
+        iter_items = [x for x in dist.entry_points
+                      if x.group == 'console_scripts' and x.name.startswith(prefix)]
 
         def command_handler(entrypoint):
             """ Handler function wrapper for a specific entrypoint. """
@@ -74,18 +192,30 @@ class ConsoleScriptsMiddleware(CommandsMiddleware):
                 entrypoint.load()()
             return handler
 
-        for entrypoint in iter_items.values():
-            if not entrypoint.name.startswith(self.prefix) or entrypoint.name == sys.argv[0]:
+        cache = self.load_cache()
+        changed = False
+
+        for entrypoint in iter_items:
+            if entrypoint.name == sys.argv[0]:
                 continue
 
-            ep_name = entrypoint.name[len(self.prefix) + 1:]
+            ep_name = entrypoint.name[prefix_len:]
             if not ep_name:
                 continue
 
             name = ' '.join(ep_name.split(self.separator))
-            desc = self.get_command_desc(entrypoint)
+            key = self.get_cache_key(entrypoint, dist)
+            if key in cache:
+                desc = cache[key]
+            else:
+                desc = cache[key] = self.get_command_desc(entrypoint)
+                changed = True
+
             command = self.add_command(name, command_handler(entrypoint), help=desc, add_help=False,
                                        prefix_chars=r'\0')
             command.add_argument('__nargs', nargs=argparse.REMAINDER)
 
+        if changed:
+            self.save_cache(cache)
+
         return super().configure(parser)
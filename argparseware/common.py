@@ -14,6 +14,13 @@ class LoggingMiddleware(IMiddleware):
     Logging middleware.
     """
 
+    LEVELS = {
+        'debug': logging.DEBUG,
+        'info': logging.INFO,
+        'warning': logging.WARNING,
+    }
+    """ The log levels selected by the middleware arguments. """
+
     def __init__(self, name: str = None, *, formatter: logging.Formatter = None,
                  handler: logging.Handler = None) -> None:
         """
@@ -30,7 +37,8 @@ class LoggingMiddleware(IMiddleware):
         output. If omitted, it will log messages to stderr.
         """
         self.name = name
-        self.formatter = formatter
+        self.formatter = formatter or \
+                logging.Formatter('%(asctime)-25s %(levelname)-10s %(name)-20s: %(message)s')
         self.handler = handler
 
     def configure(self, parser: argparse.ArgumentParser) -> None:
@@ -56,23 +64,20 @@ class LoggingMiddleware(IMiddleware):
         """
         log_level = args.log_level or \
                 ('debug' if args.verbose else 'warning' if args.quiet else 'info')
-        formatter = self.formatter or \
-                logging.Formatter('%(asctime)-25s %(levelname)-10s %(name)-20s: %(message)s')
-
-        logger = logging.getLogger(self.name)
+        level = self.LEVELS.get(log_level) or log_level.upper()
 
+        handlers = []
         if not args.log_file or args.log_std:
-            handler = self.handler or logging.StreamHandler(sys.stderr)
-            handler.setFormatter(formatter)
-            logger.addHandler(handler)
-            logger.setLevel(log_level.upper())
-
+            handlers.append(self.handler or logging.StreamHandler(sys.stderr))
         if args.log_file:
-            handler = logging.FileHandler(args.log_file)
-            handler.setFormatter(formatter)
+            handlers.append(logging.FileHandler(args.log_file))
+
+        logger = logging.getLogger(self.name)
+        for handler in handlers:
+            handler.setFormatter(self.formatter)
             logger.addHandler(handler)
-            logger.setLevel(log_level.upper())
+        logger.setLevel(level)
 
-        args.__dict__.update({'log_level': log_level})
-        del args.__dict__['quiet']
-        del args.__dict__['verbose']
+        args.log_level = log_level
+        del args.quiet
+        del args.verbose
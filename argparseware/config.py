@@ -5,12 +5,75 @@ configuration files, environment variables and the like.
 
 import os
 import sys
-import json
+import copy
 import argparse
+import functools
 import typing
 
 from .core import IMiddleware
 from .utils import merge_dicts
+from .utils import merge_item
+from .utils import parse_inline_options
+from .utils import parse_value
+
+try:
+    import anyconfig
+except ImportError:
+    anyconfig = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def load_file(filename: str, *, ignore_missing: bool = False) -> dict:
+    """
+    Load a configuration file.
+
+    Existing JSON files are loaded with `orjson` when it is available, while everything
+    else, including files it cannot parse and glob patterns, is loaded through
+    `anyconfig`. If *ignore_missing* is enabled, a file that does not exist results in
+    an empty dictionary.
+
+    The parsed contents of existing files are cached until their modification time
+    or size changes, and a copy is returned on each call.
+    """
+    try:
+        stat = os.stat(filename)
+    except OSError:
+        return _read_file(filename, ignore_missing)
+
+    data = _read_cached_file(os.path.abspath(filename), stat.st_mtime_ns, stat.st_size)
+    return copy.deepcopy(data)
+
+
+@functools.lru_cache(maxsize=128)
+def _read_cached_file(filename: str, mtime: int, size: int) -> dict:  # pylint: disable=unused-argument
+    """
+    Read an existing configuration file, caching the result by *filename*, *mtime*
+    and *size*.
+    """
+    if orjson and os.path.splitext(filename)[1].lower() == '.json':
+        with open(filename, 'rb') as fpp:
+            content = fpp.read()
+        try:
+            return orjson.loads(content)
+        except orjson.JSONDecodeError:
+            # orjson is stricter than the json module, which also accepts values such
+            # as NaN and Infinity
+            pass
+
+    return _read_file(filename, False)
+
+
+def _read_file(filename: str, ignore_missing: bool) -> dict:
+    """
+    Read a configuration file through `anyconfig`.
+    """
+    if anyconfig is None:
+        raise ImportError('anyconfig is required to load {}'.format(filename))
+    return anyconfig.load(filename, ignore_missing=ignore_missing) or {}
 
 
 class ConfigMiddleware(IMiddleware):
@@ -18,6 +81,9 @@ class ConfigMiddleware(IMiddleware):
     Configuration file middleware.
     """
 
+    __slots__ = ('defaults', 'allow_multi', 'ignore_missing', 'node', 'overwrite', 'merge',
+                 'search_paths')
+
     def __init__(self, defaults: typing.List[str] = None, *, allow_multi: bool = False,
                  ignore_missing: bool = False, node: typing.Union[str, typing.List[str]] = None,
                  overwrite: bool = False, merge: bool = True,
@@ -69,35 +135,65 @@ class ConfigMiddleware(IMiddleware):
         """
         Run the middleware.
         """
-        import anyconfig  # pylint: disable=import-outside-toplevel
-
         files = args.config_file or self.defaults
-
-        for filename in list(files):
-            if os.path.isabs(filename):
+        if isinstance(files, str):
+            files = [files]
+
+        join, isfile, islink, isabs = os.path.join, os.path.isfile, os.path.islink, os.path.isabs
+        normcase = os.path.normcase
+        indexes = {}
+
+        def exists(path, filename):
+            """ Test if a file exists in a search path, listing the path only once. """
+            if os.sep in filename or (os.altsep and os.altsep in filename):
+                pathname = join(path, filename)
+                return isfile(pathname) or islink(pathname)
+            if path not in indexes:
+                try:
+                    with os.scandir(path or '.') as entries:
+                        names = {x.name for x in entries if x.is_file() or x.is_symlink()}
+                except OSError:
+                    names = frozenset()
+                indexes[path] = (names, {normcase(x).lower() for x in names})
+
+            names, folded = indexes[path]
+            if filename in names:
+                return True
+            if normcase(filename).lower() in folded:
+                # the name only matches case-insensitively, which depends on the file system
+                pathname = join(path, filename)
+                return isfile(pathname) or islink(pathname)
+            return False
+
+        resolved = []
+        for filename in files:
+            if isabs(filename):
+                resolved.append(filename)
                 continue
-            for path in self.search_paths:
-                pathname = os.path.join(path, filename)
-                if os.path.isfile(pathname) or os.path.islink(pathname):
-                    files.append(pathname)
-                    if filename in files:
-                        files.remove(filename)
-
-        data = anyconfig.load(files, ignore_missing=self.ignore_missing)
+            resolved.append(next((join(path, filename) for path in self.search_paths
+                                  if exists(path, filename)), filename))
+        files = resolved
+
+        data = {}
+        for filename in files:
+            merge_item(data, load_file(filename, ignore_missing=self.ignore_missing), True, True)
+
+        if not self.node:
+            merge_item(args.__dict__, data, self.overwrite, self.merge)
+            return
+
         result = merge_dicts(
             args.__dict__, data,
             overwrite=self.overwrite,
             recurse=self.merge,
         )
 
-        if self.node:
-            ref = result
-            node = [self.node] if isinstance(self.node, str) else self.node
-            for item in node:
-                ref = result.get(item, {})
-            result = ref
+        node = (self.node,) if isinstance(self.node, str) else self.node
+        for item in node:
+            result = result.get(item, {}) if isinstance(result, dict) else {}
 
-        args.__dict__.update(result)
+        if isinstance(result, dict):
+            args.__dict__.update(result)
 
 
 class ConfigListMiddleware(IMiddleware):
@@ -105,6 +201,8 @@ class ConfigListMiddleware(IMiddleware):
     Configuration file list middleware.
     """
 
+    __slots__ = ('defaults', 'allow_multi', 'ignore_missing', 'merge')
+
     def __init__(self, defaults: typing.Union[bool, dict] = None, *, allow_multi: bool = True,
                  ignore_missing: bool = False, merge: bool = True) -> None:
         """
@@ -143,22 +241,23 @@ class ConfigListMiddleware(IMiddleware):
         """
         Run the middleware.
         """
-        import anyconfig  # pylint: disable=import-outside-toplevel
+        defaults = dict(args.__dict__ if self.defaults is True else self.defaults)
 
-        defaults = args.__dict__ if self.defaults is True else self.defaults
+        files = args.config_files or []
+        if isinstance(files, str):
+            files = [files]
 
         results = []
-        for filename in args.config_files or []:
+        for filename in files:
             if filename == '-':
-                result = dict(defaults)
+                results.append(defaults.copy())
+                continue
+
+            data = load_file(filename, ignore_missing=self.ignore_missing)
+            if self.merge:
+                results.append(merge_dicts(defaults, data, overwrite=True))
             else:
-                data = anyconfig.load(filename, ignore_missing=self.ignore_missing)
-                result = merge_dicts(
-                    defaults, data,
-                    overwrite=True,
-                    recurse=self.merge,
-                )
-            results.append(result)
+                results.append({**defaults, **data})
 
         args.__dict__.update({'config_data': results})
 
@@ -168,6 +267,8 @@ class InlineOptionMiddleware(IMiddleware):
     Inline option middleware.
     """
 
+    __slots__ = ('args', 'dest', 'merge', 'help')
+
     def __init__(self, *args, dest: str = None, merge: bool = False,
                  help: str = None) -> None:  # pylint:disable=redefined-builtin
         """
@@ -213,25 +314,12 @@ class InlineOptionMiddleware(IMiddleware):
         """
         Run the middleware.
         """
-        data = getattr(args, self.dest)
-
-        items = []
-        for item in data or []:
-            if '=' in item:
-                key, value = item.split('=', 1)
-                try:
-                    value = json.loads(value)
-                except json.decoder.JSONDecodeError:
-                    pass
-                items.append({key: value})
+        items = parse_inline_options(getattr(args, self.dest))
 
         if self.merge:
-            result = {}
-            for item in items:
-                result.update(item)
-            args.__dict__.update({self.dest: result})
+            args.__dict__.update({self.dest: dict(items)})
         else:
-            args.__dict__.update({self.dest: list(items)})
+            args.__dict__.update({self.dest: [{key: value} for key, value in items]})
 
 
 class InlineConfigMiddleware(IMiddleware):
@@ -239,6 +327,8 @@ class InlineConfigMiddleware(IMiddleware):
     Inline configuration middleware.
     """
 
+    __slots__ = ('overwrite', 'merge')
+
     def __init__(self, *, overwrite: bool = True, merge: bool = True) -> None:
         """
         This middleware registers an argument - that can be specified multiple times -
@@ -263,23 +353,10 @@ class InlineConfigMiddleware(IMiddleware):
         """
         Run the middleware.
         """
-        items = []
-        for item in args.config_env or []:
-            if '=' in item:
-                key, value = item.split('=', 1)
-                try:
-                    value = json.loads(value)
-                except json.decoder.JSONDecodeError:
-                    pass
-                items.append({key: value})
+        data = dict(parse_inline_options(args.config_env))
 
-        result = merge_dicts(
-            args.__dict__, *items,
-            overwrite=self.overwrite,
-            recurse=self.merge,
-        )
-
-        args.__dict__.update(result)
+        if data:
+            merge_item(args.__dict__, data, self.overwrite, self.merge)
         del args.__dict__['config_env']
 
 
@@ -288,6 +365,8 @@ class EnvironmentConfigMiddleware(IMiddleware):
     Environment variables middleware.
     """
 
+    __slots__ = ('prefix', 'lower', 'overwrite', 'merge')
+
     def __init__(self, prefix: str, *, lower: bool = True, overwrite: bool = False,
                  merge: bool = True) -> None:
         """
@@ -314,26 +393,20 @@ class EnvironmentConfigMiddleware(IMiddleware):
         """
         Run the middleware.
         """
+        prefix, length, lower = self.prefix, len(self.prefix), self.lower
+
         data = {}
         for key, value in os.environ.items():
-            if not key.startswith(self.prefix):
+            if key[:length] != prefix:
                 continue
 
-            if self.lower:
-                key = key[len(self.prefix):].lower()
+            key = key[length:].lower() if lower else key[length:]
+            data[key] = parse_value(value)
 
-            try:
-                value = json.loads(value)
-                data[key] = value
-            except json.decoder.JSONDecodeError:
-                data[key] = value
+        if not data:
+            return
 
-        result = merge_dicts(
-            args.__dict__, data,
-            overwrite=self.overwrite,
-            recurse=self.merge,
-        )
-        args.__dict__.update(result)
+        merge_item(args.__dict__, data, self.overwrite, self.merge)
 
 
 class InjectMiddleware(IMiddleware):
@@ -341,6 +414,8 @@ class InjectMiddleware(IMiddleware):
     Default arguments injection middleware.
     """
 
+    __slots__ = ('defaults',)
+
     def __init__(self, defaults: dict) -> None:
         """
         This middleware injects defaults for any parameter that wasn't specified at
@@ -352,9 +427,11 @@ class InjectMiddleware(IMiddleware):
         """
         Run the middleware.
         """
-        result = merge_dicts(
-            args.__dict__, self.defaults,
-            overwrite=False, recurse=True,
-        )
+        data = args.__dict__
+
+        if not any(isinstance(value, dict) for value in self.defaults.values()):
+            for key, value in self.defaults.items():
+                data.setdefault(key, value)
+            return
 
-        args.__dict__.update(result)
+        merge_item(data, self.defaults, False, True)
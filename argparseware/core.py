@@ -21,6 +21,8 @@ class IMiddleware(metaclass=abc.ABCMeta):
     This class is the base interface for all middleware.
     """
 
+    __slots__ = ()
+
     def configure(self, parser: argparse.ArgumentParser) -> None:
         """
         This method is invoked before the arguments are parsed and is passed the parser
@@ -113,14 +115,11 @@ class ArgumentParser(argparse.ArgumentParser):
         """
         # NOTE: the reason we're not using a for-loop here is to allow middleware to
         # add other middleware within their configure method.
+        middlewares = self.middlewares
         index = 0
-        while True:
-            try:
-                item = self.middlewares[index]
-                index += 1
-            except IndexError:
-                break
-            item.configure(self)
+        while index < len(middlewares):
+            middlewares[index].configure(self)
+            index += 1
 
         return super().parse_args(*args, **kwargs)
 
@@ -135,13 +134,10 @@ class ArgumentParser(argparse.ArgumentParser):
         """
         namespace = self.parse_args(*args, **kwargs)
 
+        middlewares = self.middlewares
         index = 0
-        while True:
-            try:
-                item = self.middlewares[index]
-                index += 1
-            except IndexError:
-                break
-            item.run(namespace)
+        while index < len(middlewares):
+            middlewares[index].run(namespace)
+            index += 1
 
         return namespace
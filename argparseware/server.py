@@ -3,10 +3,10 @@ This module provides middleware definitions for use with WSGI servers and
 applications like Flask and gunicorn.
 """
 
-import os
 import abc
 import sys
 import argparse
+import functools
 import signal
 import typing
 import logging
@@ -15,11 +15,25 @@ from .core import IMiddleware
 from .common import LoggingMiddleware
 
 
+@functools.lru_cache(maxsize=None)
+def _parse_addr(addr: typing.Union[int, str]) -> typing.Tuple[str, int]:
+    """
+    Parse an address string into a tuple of host, port.
+    """
+    if isinstance(addr, str) and ':' in addr:
+        host, _, port = addr.rpartition(':')
+        return (host or '0.0.0.0', int(port))
+
+    return ('0.0.0.0', int(addr))
+
+
 class ServerMiddleware(IMiddleware, metaclass=abc.ABCMeta):
     """
     WSGI server middleware.
     """
 
+    __slots__ = ('app', 'addr')
+
     def __init__(self, app: typing.Callable, addr: typing.Union[int, str]) -> None:
         """
         This middleware interface can be used by sub-implementations to configure
@@ -38,12 +52,7 @@ class ServerMiddleware(IMiddleware, metaclass=abc.ABCMeta):
         """
         Parse an address string into a tuple of host, port.
         """
-        if isinstance(addr, str) and ':' in addr:
-            host, port = addr.split(addr)
-            host = host or '0.0.0.0'
-            return (host, int(port))
-
-        return ('0.0.0.0', int(addr))
+        return _parse_addr(addr)
 
     def configure(self, parser: argparse.ArgumentParser) -> None:
         """
@@ -196,7 +205,7 @@ class GunicornServerMiddleware(ServerMiddleware, metaclass=abc.ABCMeta):
         self.server.run()
 
     def create_server(self, addr, *, count: int, timeout: int, preload: bool,
-                   log_level: int) -> 'WSGIApplication':
+                   log_level: typing.Union[int, str]) -> 'WSGIApplication':
         """
         Create the application server through gunicorn.
 
@@ -214,7 +223,7 @@ class GunicornServerMiddleware(ServerMiddleware, metaclass=abc.ABCMeta):
         rather than lazy loaded at runtime.
 
         The *log_level* can be changed to a specific verbosity level, using the `logging`
-        package values.
+        package values or level names.
         """
         from gunicorn.app.wsgiapp import WSGIApplication
         from gunicorn.arbiter import Arbiter
@@ -242,9 +251,12 @@ class GunicornServerMiddleware(ServerMiddleware, metaclass=abc.ABCMeta):
 
         host, port = self.parse_addr(addr)
 
+        if not isinstance(log_level, str):
+            log_level = logging.getLevelName(log_level)
+
         args = [
             '--bind', '{0}:{1}'.format(host, port),
-            '--log-level', logging.getLevelName(log_level).lower(),
+            '--log-level', log_level.lower(),
             '--workers' if self.worker_class != 'gthread' else '--threads', str(count),
             '--timeout', str(timeout),
             '--preload' if preload else '',
@@ -256,10 +268,12 @@ class GunicornServerMiddleware(ServerMiddleware, metaclass=abc.ABCMeta):
 
         for key, value in self.kwargs.items():
             key = key.replace('_', '-')
-            args += ['--{0}'.format(key), value]
+            args += ['--{0}'.format(key), str(value)]
 
-        sys.argv = [sys.argv[0]]
-        os.environ['GUNICORN_CMD_ARGS'] = ' '.join(args)
+        # NOTE: gunicorn parses the command line arguments itself when loading its
+        # configuration, so the options are passed as-is rather than through the
+        # GUNICORN_CMD_ARGS variable, which would be split on spaces.
+        sys.argv = [sys.argv[0]] + [x for x in args if x]
         return WSGIServer('')
 
     def stop(self) -> None:
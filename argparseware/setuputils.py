@@ -3,16 +3,15 @@ This module provides integration with setuptools.
 """
 
 import os
-import re
 import sys
-import tempfile
-import signal
-import pickle
+import json
 import argparse
 import subprocess
-import pkg_resources
 
 from . import IMiddleware
+from .utils import get_distribution
+from .utils import USAGE_RE
+from .utils import WS_RE
 
 
 class ConsoleScriptsMiddleware(IMiddleware):
@@ -41,22 +40,25 @@ class ConsoleScriptsMiddleware(IMiddleware):
         self.separator = separator
         self.prefix = prefix or pkg_name.replace('.', '-')
         self.parsers = {}
+        self.entrypoints = {}
+        self._commands_map = None
 
     @classmethod
     def get_command_desc(cls, command: str, *, wait: float = 5) -> str:
         """
         Get a command description by running it and parsing the output.
         """
-        proc = subprocess.Popen([command, '--help'],
-                                stdout=subprocess.PIPE,
-                                stderr=subprocess.PIPE)
-        proc.wait(wait)
-        proc.terminate()
-        output = proc.communicate()[0].decode('utf-8')
+        try:
+            proc = subprocess.run([command, '--help'], stdout=subprocess.PIPE,
+                                  stderr=subprocess.PIPE, timeout=wait, check=False)
+        except subprocess.TimeoutExpired:
+            return None
+
+        output = proc.stdout.decode('utf-8')
 
-        matches = re.match(r'^usage: .*\n\n([^\n]*)\n\n.*', output, flags=re.MULTILINE | re.DOTALL)
+        matches = USAGE_RE.match(output)
         if matches:
-            return re.sub(' +', ' ', matches.groups()[0].replace('\n', ' '))
+            return WS_RE.sub(' ', matches.groups()[0].replace('\n', ' '))
 
         return None
 
@@ -65,64 +67,137 @@ class ConsoleScriptsMiddleware(IMiddleware):
         """
         Get the cache filename.
         """
+        import tempfile  # pylint: disable=import-outside-toplevel
+
         if not self.cache:
             return None
 
-        filename = '.argparseware-cscache-{}-{}.pickle'.format(
+        filename = '.argparseware-cscache-{}-{}.json'.format(
             self.pkg_name, self.prefix,
         )
         return os.path.join(tempfile.gettempdir(), filename)
 
+    @property
+    def cache_key(self) -> str:
+        """
+        Get the cache key, which changes whenever a directory of the path is modified,
+        such as when a package is installed or removed. The current directory and
+        entries that are not directories are ignored.
+        """
+        import hashlib  # pylint: disable=import-outside-toplevel
+        import stat  # pylint: disable=import-outside-toplevel
+
+        items = [self.separator]
+        for path in sys.path:
+            # the empty entry is the current directory, which has nothing to do with
+            # installed packages
+            if not path:
+                continue
+            try:
+                info = os.stat(path)
+            except OSError:
+                continue
+            if stat.S_ISDIR(info.st_mode):
+                items.append('{}:{}'.format(path, info.st_mtime_ns))
+
+        return hashlib.sha1('\n'.join(items).encode('utf-8')).hexdigest()
+
     @property
     def commands_map(self) -> dict:
         """
         Get a map of commands from the path specification.
 
         The value returned is a map with the key as the command, and the value as the
-        description of the command, if applicable.
+        description of the command, if applicable. The map is computed once per instance.
+        """
+        if self._commands_map is None:
+            self._commands_map = self._compute_commands_map()
+        return self._commands_map
+
+    def _compute_commands_map(self) -> tuple:
+        """
+        Compute the map of commands, using the cache file if possible.
         """
+        cache_key = self.cache_key if self.cache else None
+        cached_descs = {}
+
         try:
-            with open(self.cache_file, 'rb') as fpp:
-                data = pickle.load(fpp)
-                return data['commands_map']
+            with open(self.cache_file, 'r') as fpp:
+                data = json.load(fpp)
+            if data['key'] == cache_key:
+                return tuple(data['commands_map'])
+            cached_descs = data.get('descs') or {}
         except Exception:
             pass
 
-        iter_items = pkg_resources.get_entry_map(self.pkg_name)['console_scripts']
+        dist = get_distribution(self.pkg_name)
         result = {}
         tree = {}
 
-        for entrypoint in iter_items.values():
-            prefix = '{}{}'.format(self.prefix, self.separator)
-            if not entrypoint.name.startswith(prefix):
-                continue
-
-            names = entrypoint.name[len(prefix):].split(self.separator)
+        prefix = '{}{}'.format(self.prefix, self.separator)
+        prefix_len = len(prefix)
+        entrypoints = {x.name: x for x in dist.entry_points
+                       if x.group == 'console_scripts' and x.name.startswith(prefix)}
+        scripts = list(entrypoints)
+
+        # descriptions are also cached per entry point, so that only the scripts that
+        # actually changed are run when the path is modified
+        desc_keys = {x: '{}|{}|{}'.format(x, entrypoints[x].value, dist.version)
+                     for x in scripts}
+        descs = {x: cached_descs[desc_keys[x]] for x in scripts if desc_keys[x] in cached_descs}
+        missing = [x for x in scripts if x not in descs]
+
+        if missing:
+            import concurrent.futures  # pylint: disable=import-outside-toplevel
+
+            with concurrent.futures.ThreadPoolExecutor(min(32, len(missing))) as executor:
+                futures = {x: executor.submit(self.get_command_desc, x, wait=self.wait)
+                           for x in missing}
+            descs.update((x, future.result()) for x, future in futures.items())
+
+        for script in scripts:
+            names = script[prefix_len:].split(self.separator)
             cmd = ' '.join(names)
+            last_name = names.pop()
             ref = tree
-            desc = None
 
             for name in names:
-                if names[-1] == name:
-                    ref[name] = self.get_command_desc(entrypoint.name, wait=self.wait)
-                    desc = ref[name]
-                    continue
-                if name not in ref:
-                    ref[name] = {}
-                ref = ref[name]
+                ref = ref.setdefault(name, {})
 
+            ref[last_name] = desc = descs[script]
             result[cmd] = desc
+            self.entrypoints[cmd] = entrypoints[script]
 
-        try:
-            with open(self.cache_file, 'wb') as fpp:
-                pickle.dump({
-                    'commands_map': (result, tree),
-                }, fpp, protocol=3)
-        except Exception:
-            pass
+        cache_file = self.cache_file
+        if cache_file:
+            try:
+                filename = '{}.{}.tmp'.format(cache_file, os.getpid())
+                with open(filename, 'w') as fpp:
+                    json.dump({
+                        'key': cache_key,
+                        'commands_map': (result, tree),
+                        'descs': {desc_keys[x]: descs[x] for x in scripts},
+                    }, fpp, separators=(',', ':'))
+                os.replace(filename, cache_file)
+            except Exception:
+                pass
 
         return (result, tree)
 
+    def get_entrypoint(self, name: str):
+        """
+        Get the entry point object for the command *name*, if any.
+        """
+        if name not in self.entrypoints:
+            script = '{}{}{}'.format(self.prefix, self.separator,
+                                     self.separator.join(name.split(' ')))
+            dist = get_distribution(self.pkg_name)
+            self.entrypoints[name] = next((x for x in dist.entry_points
+                                           if x.group == 'console_scripts' and x.name == script),
+                                          None)
+
+        return self.entrypoints[name]
+
     def configure(self, parser: argparse.ArgumentParser) -> None:
         """
         Configure the middleware arguments.
@@ -131,16 +206,14 @@ class ConsoleScriptsMiddleware(IMiddleware):
         subparsers = parser.add_subparsers(metavar='command', dest='entrypoint')
         self.parsers[''] = parser
 
-        def add_parsers(data, subparser, parent=None):
-            if parent:
-                node = subparser.add_subparsers(
-                    metavar='command',
-                    dest='entrypoint_{}'.format(parent.replace(' ', '_')),
-                )
-            else:
-                node = subparsers
+        # walk the tree depth-first, keeping the iterator of each level on the stack so
+        # that parsers are added in the same order as in the tree
+        stack = [(iter(tree.items()), subparsers, None)]
 
-            for name, items in data.items():
+        while stack:
+            items_iter, node, parent = stack[-1]
+
+            for name, items in items_iter:
                 parent_name = '{} {}'.format(parent, name) if parent else name
                 if not isinstance(items, dict):
                     subparser = node.add_parser(name, help=items, add_help=False, prefix_chars='+')
@@ -151,9 +224,14 @@ class ConsoleScriptsMiddleware(IMiddleware):
 
                 else:
                     subparser = self.parsers[parent_name] = node.add_parser(name)
-                    add_parsers(items, subparser, parent_name)
-
-        add_parsers(tree, parser)
+                    child = subparser.add_subparsers(
+                        metavar='command',
+                        dest='entrypoint_{}'.format(parent_name.replace(' ', '_')),
+                    )
+                    stack.append((iter(items.items()), child, parent_name))
+                    break
+            else:
+                stack.pop()
 
         return parser
 
@@ -182,25 +260,23 @@ class ConsoleScriptsMiddleware(IMiddleware):
         name = ' '.join(command)
 
         if name in self.commands_map[0]:
-            script = '-'.join([self.prefix] + command)
-            proc = subprocess.Popen([script] + args.entrypoint_nargs)
-
-            def forward_signal(signum, _frame):
-                """ Forward a signal to the child process. """
-                proc.send_signal(signum)
-
-            for signum in set(signal.Signals) - {signal.SIGKILL, signal.SIGSTOP}:  # pylint:disable=no-member
-                signal.signal(signum, forward_signal)
+            script = '{}{}{}'.format(self.prefix, self.separator, self.separator.join(command))
+            entrypoint = self.get_entrypoint(name)
 
             try:
-                proc.communicate()
+                func = entrypoint.load() if entrypoint else None
             except Exception:
-                try:
-                    proc.terminate()
-                except Exception:
-                    pass
+                func = None
+
+            if func:
+                sys.argv = [script] + args.entrypoint_nargs
+                sys.exit(func())
 
-            sys.exit(proc.returncode)
+            # replace the current process, so that signals and the exit status are
+            # handled by the script itself; buffered output would be lost otherwise
+            sys.stdout.flush()
+            sys.stderr.flush()
+            os.execvp(script, [script] + args.entrypoint_nargs)
         else:
             self.parsers[name].print_help()
             sys.exit(0)
@@ -3,8 +3,13 @@ This module provides utility functions that can be used in middleware.
 """
 
 import typing
-import os
+import re
 import json
+import shutil
+
+
+MISSING = object()
+""" A sentinel for keys that are missing from a dictionary or a namespace. """
 
 
 def merge_dicts(data: dict, *args: typing.List[dict], overwrite: bool = True,
@@ -14,7 +19,9 @@ def merge_dicts(data: dict, *args: typing.List[dict], overwrite: bool = True,
 
     If *recurse* is true, the dictionaries are merged recursively. When *overwrite*
     is true, any value that exist in previous dictionaries will be overwritten with the
-    latest (until that value is also a dictionary and *recurse* is true).
+    latest (until that value is also a dictionary and *recurse* is true). Otherwise, the
+    first value found for a key is kept, whether it comes from *data* or from one of the
+    dictionaries merged into it.
 
     >>> merge_dicts({'foo': {'hello': 'world'}}, {'foo': {'bar': 'baz'}})
     {'foo': {'hello': 'world', 'bar': 'baz'}}
@@ -22,65 +29,122 @@ def merge_dicts(data: dict, *args: typing.List[dict], overwrite: bool = True,
     {'foo': {'bar': 'baz'}}
     >>> merge_dicts({'foo': {'hello': 'world'}}, {'foo': {'hello': 'test'}}, overwrite=False)
     {'foo': {'hello': 'world'}}
+    >>> merge_dicts({}, {'foo': 1}, {'foo': 2}, overwrite=False)
+    {'foo': 1}
     >>> merge_dicts({'foo': {'hello': 'world'}}, {'foo': 'bar'})
     {'foo': 'bar'}
+    >>> merge_dicts({}, {'foo': {'a': 1}}, {'foo': {'b': 2}})
+    {'foo': {'a': 1, 'b': 2}}
     """
     result = dict(data)
 
     for item in args:
         for key, value in item.items():
-            data_value = data.get(key)
-
-            if isinstance(value, dict) and isinstance(data_value, dict) and recurse:
-                result[key] = merge_dicts(data_value, value, overwrite=overwrite)
-            elif key in data:
-                if overwrite:
-                    result[key] = value
-                else:
-                    result[key] = data_value
-            else:
+            existing = result.get(key, MISSING)
+
+            if existing is MISSING:
+                result[key] = value
+            elif recurse and isinstance(value, dict) and isinstance(existing, dict):
+                result[key] = merge_dicts(existing, value, overwrite=overwrite)
+            elif overwrite:
                 result[key] = value
 
     return result
 
 
+def merge_item(data: dict, item: dict, overwrite: bool, recurse: bool) -> dict:
+    """
+    Merge a single dictionary into *data* in place and return it.
+
+    This works like `merge_dicts` with a single dictionary to merge, except that *data*
+    itself is updated rather than copied. Nested dictionaries are still merged into new
+    dictionaries, so that values shared with other objects are never modified. The
+    arguments are positional, since this is used in code that is run often.
+
+    >>> data = {'foo': {'hello': 'world'}}
+    >>> merge_item(data, {'foo': {'bar': 'baz'}, 'qux': 42}, True, True) is data
+    True
+    >>> data
+    {'foo': {'hello': 'world', 'bar': 'baz'}, 'qux': 42}
+    >>> merge_item({'foo': {'hello': 'world'}}, {'foo': 'bar'}, False, True)
+    {'foo': {'hello': 'world'}}
+    """
+    for key, value in item.items():
+        if key not in data:
+            data[key] = value
+            continue
+
+        data_value = data[key]
+        if isinstance(value, dict) and isinstance(data_value, dict) and recurse:
+            data[key] = merge_dicts(data_value, value, overwrite=overwrite)
+        elif overwrite:
+            data[key] = value
+
+    return data
+
+
+def get_distribution(name: str) -> 'importlib.metadata.Distribution':
+    """
+    Get an installed distribution by name, through `importlib.metadata` or, on Python
+    versions before 3.8, the `importlib_metadata` backport.
+    """
+    try:
+        from importlib import metadata  # pylint: disable=import-outside-toplevel
+    except ImportError:
+        import importlib_metadata as metadata  # pylint: disable=import-outside-toplevel
+
+    return metadata.distribution(name)
+
+
 def which(program: str) -> str:
     """
     Find the path to an exectable.
     """
-    def is_executable(filename):
-        """ Test if a file is executable. """
-        return os.path.isfile(filename) and os.access(filename, os.X_OK)
+    return shutil.which(program)
+
 
-    path = os.path.split(program)[0]
-    if path:
-        if is_executable(program):
-            return program
+JSON_RE = re.compile(r'\s*(?:-?(?:\d|Infinity)|true|false|null|NaN|["\[{])')
+""" The pattern matching the start of a JSON value. """
 
-    for path in os.environ['PATH'].split(os.pathsep):
-        filename = os.path.join(path, program)
-        if is_executable(filename):
-            return filename
+USAGE_RE = re.compile(r'^usage: .*\n\n([^\n]*)\n\n.*', re.MULTILINE | re.DOTALL)
+""" The pattern matching the description in the help output of a command. """
 
-    return None
+WS_RE = re.compile(' +')
+""" The pattern matching consecutive spaces. """
+
+
+def parse_value(value: str) -> typing.Any:
+    """
+    Parse a value as JSON, unless it does not start like a JSON value or fails to
+    parse, in which case it is returned unchanged.
+
+    >>> parse_value('{"a": [1, 2]}'), parse_value('foo'), parse_value('[1')
+    ({'a': [1, 2]}, 'foo', '[1')
+    """
+    if JSON_RE.match(value):
+        try:
+            return json.loads(value)
+        except ValueError:
+            pass
+    return value
 
 
 def parse_inline_options(data: typing.List[str]) -> typing.List[typing.Tuple[str, object]]:
     """
-    Parse a list of inline options.
+    Parse a list of inline options in the form of `KEY=VALUE`, returning a list of
+    key and value tuples. Items without an equal sign are ignored.
 
-    If *as_list* is enabled, each item is returned as a tuple
+    Each value is parsed with `parse_value()`.
 
+    >>> parse_inline_options(['foo=42', 'bar=baz', 'qux', 'foo={"a": null}', 'baz= 5'])
+    [('foo', 42), ('bar', 'baz'), ('foo', {'a': None}), ('baz', 5)]
     """
     items = []
+    append = items.append
 
     for item in data or []:
-        if '=' in item:
-            key, value = item.split('=', 1)
-            try:
-                value = json.loads(value)
-            except json.decoder.JSONDecodeError:
-                pass
-            items.append((key, value))
+        key, sep, value = item.partition('=')
+        if sep:
+            append((key, parse_value(value)))
 
     return items
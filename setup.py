@@ -1,5 +1,7 @@
 #!/usr/bin/env python3
 
+import itertools
+
 from setuptools import setup
 from setuptools import find_packages
 
@@ -18,16 +20,17 @@ extras_require = {
 }
 
 # All dependencies
-extras_require['all'] = []
-for key in extras_require:
-    if key != 'all':
-        extras_require['all'] += extras_require[key]
+extras_require['all'] = list(itertools.chain.from_iterable(extras_require.values()))
+
+# Required dependencies
+with open('requirements.txt') as fpp:
+    install_requires = [x for x in (line.strip() for line in fpp) if x and not x.startswith('#')]
 
 # Setup script
 setup(
     long_description=open('README.md').read(),
     long_description_content_type='text/markdown',
     packages=find_packages(exclude=['tests', 'tests.*']),
-    install_requires=list(open('requirements.txt')),
+    install_requires=install_requires,
     extras_require=extras_require,
 )